@@ -1,7 +1,59 @@
 const axios = require('axios');
+const https = require('https');
 const logger = require('../utils/logger');
 const ApiError = require('../utils/ApiError');
 
+// Caption/username patterns, compiled once at module load
+const HASHTAG_REGEX = /#[\w\u0590-\u05ff\u0900-\u097f]+/g;
+const MENTION_REGEX = /@[\w.]+/g;
+const ASCII_HASHTAG_REGEX = /#[a-zA-Z0-9_]+/g;
+const USERNAME_REGEX = /^[a-zA-Z0-9._]{1,30}$/;
+
+// Common content categories detected in captions
+const CONTENT_CATEGORIES = [
+  'fashion', 'food', 'travel', 'fitness', 'beauty', 'lifestyle',
+  'music', 'art', 'dance', 'comedy', 'tech', 'sports', 'nature',
+  'motivation', 'education', 'business', 'diy', 'recipe', 'tutorial'
+];
+
+// Request headers shared by every service instance
+const DEFAULT_HEADERS = Object.freeze({
+  'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+  'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+  'Accept-Language': 'en-US,en;q=0.5',
+  'Accept-Encoding': 'gzip, deflate',
+  'Connection': 'keep-alive',
+  'X-IG-App-ID': '936619743392459',
+  'X-ASBD-ID': '198387',
+  'X-Requested-With': 'XMLHttpRequest'
+});
+
+// Pooled keep-alive client so repeated Instagram calls reuse TLS connections.
+// Idle sockets time out (as in Node 19+'s global agent) so we don't reuse ones Instagram has closed,
+// and LIFO scheduling hands out the most recently used, least likely stale, socket first.
+const httpClient = axios.create({
+  httpsAgent: new https.Agent({
+    keepAlive: true,
+    timeout: 5000,
+    scheduling: 'lifo',
+    maxSockets: 64,
+    maxFreeSockets: 32
+  })
+});
+
+// Retry policy for transient Instagram failures
+const RETRYABLE_STATUSES = new Set([429, 500, 502, 503, 504]);
+const MAX_RETRIES = 3;
+const RETRY_BASE_DELAY = 500;
+const MAX_RETRY_DELAY = 10000;
+
+// Unread bodies up to this size are drained rather than destroyed, keeping the socket pooled
+const MAX_DRAIN_BYTES = 64 * 1024;
+
+// Profile responses are reused briefly so one dashboard load fetches each profile once
+const PROFILE_CACHE_TTL = 60 * 1000;
+const PROFILE_CACHE_MAX_ENTRIES = 500;
+
 /**
  * Instagram Data Scraping Service
  * Modular and reusable Instagram data extraction
@@ -9,22 +61,16 @@ const ApiError = require('../utils/ApiError');
 class InstagramService {
   constructor() {
     this.baseURL = 'https://www.instagram.com';
-    this.headers = {
-      'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-      'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-      'Accept-Language': 'en-US,en;q=0.5',
-      'Accept-Encoding': 'gzip, deflate',
-      'Connection': 'keep-alive',
-      'X-IG-App-ID': '936619743392459',
-      'X-ASBD-ID': '198387',
-      'X-Requested-With': 'XMLHttpRequest'
-    };
+    this.headers = DEFAULT_HEADERS;
 
     // Rate limiting
     this.requestQueue = [];
     this.isProcessingQueue = false;
     this.maxRequestsPerMinute = 30;
     this.requestTimestamps = [];
+
+    // Short-lived cache of raw profile responses, keyed by username
+    this.profileCache = new Map();
   }
 
   /**
@@ -44,15 +90,12 @@ class InstagramService {
       // Check rate limit
       await this.checkRateLimit();
 
-      const profileUrl = `${this.baseURL}/api/v1/users/web_profile_info/?username=${username}`;
-      const response = await this.makeRequest(profileUrl);
+      const user = await this.fetchProfileUser(username);
 
-      if (!response.data?.data?.user) {
+      if (!user) {
         throw new ApiError(404, `Instagram user @${username} not found`);
       }
 
-      const user = response.data.data.user;
-
       // Transform Instagram data to our format
       const profileData = this.transformProfileData(user);
 
@@ -65,6 +108,35 @@ class InstagramService {
     }
   }
 
+  /**
+   * Fetch the raw web_profile_info user object, reusing a recent response if available
+   * @param {string} username - Instagram username
+   * @returns {Object|null} Raw Instagram user data, or null if not found
+   */
+  async fetchProfileUser(username) {
+    const cached = this.profileCache.get(username);
+    if (cached && Date.now() - cached.fetchedAt < PROFILE_CACHE_TTL) {
+      return cached.user;
+    }
+
+    const profileUrl = `${this.baseURL}/api/v1/users/web_profile_info/?username=${username}`;
+    // Only the primary profile fetch retries; fallback probes fail fast so a 429 isn't multiplied
+    const response = await this.makeRequest(profileUrl, { retry: true });
+    const user = response.data?.data?.user || null;
+
+    if (user) {
+      this.profileCache.delete(username);
+      this.profileCache.set(username, { user, fetchedAt: Date.now() });
+
+      // Evict the oldest entry once the cache is full
+      if (this.profileCache.size > PROFILE_CACHE_MAX_ENTRIES) {
+        this.profileCache.delete(this.profileCache.keys().next().value);
+      }
+    }
+
+    return user;
+  }
+
   /**
    * Get user posts from Instagram
    * @param {string} username - Instagram username
@@ -76,14 +148,12 @@ class InstagramService {
       logger.info(`Fetching ${limit} posts for @${username}`);
 
       // Strategy 1: Get initial posts from profile
-      const profileUrl = `${this.baseURL}/api/v1/users/web_profile_info/?username=${username}`;
-      const response = await this.makeRequest(profileUrl);
+      const user = await this.fetchProfileUser(username);
 
-      if (!response.data?.data?.user) {
+      if (!user) {
         throw new ApiError(404, `Instagram user @${username} not found`);
       }
 
-      const user = response.data.data.user;
       let posts = this.extractPostsFromProfile(user, limit);
 
       logger.info(`Strategy 1: Got ${posts.length} posts from profile`);
@@ -91,19 +161,20 @@ class InstagramService {
       // Log the post IDs for debugging
       const profilePostIds = posts.map(p => p.shortcode);
       logger.info(`Profile post IDs: ${profilePostIds.join(', ')}`);
+      const profilePostIdSet = new Set(profilePostIds);
 
       // Strategy 2: If we need more posts, try multiple additional approaches
       if (posts.length < limit) {
         logger.info(`Attempting to get ${limit - posts.length} more posts using aggressive methods`);
 
         // Try pagination first (most likely to get truly additional posts)
-        const paginatedPosts = await this.fetchOlderPostsWithPagination(user.id, limit - posts.length);
+        const paginatedPosts = await this.fetchOlderPostsWithPagination(user, limit - posts.length);
         if (paginatedPosts.length > 0) {
           const paginatedPostIds = paginatedPosts.map(p => p.shortcode);
           logger.info(`Paginated post IDs: ${paginatedPostIds.join(', ')}`);
 
           const uniquePaginatedPosts = paginatedPosts.filter(paginatedPost =>
-            !profilePostIds.includes(paginatedPost.shortcode)
+            !profilePostIdSet.has(paginatedPost.shortcode)
           );
 
           if (uniquePaginatedPosts.length > 0) {
@@ -115,21 +186,23 @@ class InstagramService {
         }
 
         // Try mobile web endpoint if still need more
-        const mobilePosts = await this.fetchFromMobileWeb(username, posts.length, limit - posts.length);
-        if (mobilePosts.length > 0) {
-          const mobilePostIds = mobilePosts.map(p => p.shortcode);
-          logger.info(`Mobile post IDs: ${mobilePostIds.join(', ')}`);
-
-          // Check for duplicates
-          const uniqueMobilePosts = mobilePosts.filter(mobilePost =>
-            !profilePostIds.includes(mobilePost.shortcode)
-          );
-
-          if (uniqueMobilePosts.length > 0) {
-            posts = posts.concat(uniqueMobilePosts);
-            logger.info(`Strategy 2a: Mobile web added ${uniqueMobilePosts.length} NEW posts. Total: ${posts.length}`);
-          } else {
-            logger.warn(`Strategy 2a: Mobile web returned ${mobilePosts.length} posts but they were all duplicates`);
+        if (posts.length < limit) {
+          const mobilePosts = await this.fetchFromMobileWeb(username, posts.length, limit - posts.length);
+          if (mobilePosts.length > 0) {
+            const mobilePostIds = mobilePosts.map(p => p.shortcode);
+            logger.info(`Mobile post IDs: ${mobilePostIds.join(', ')}`);
+
+            // Check for duplicates
+            const uniqueMobilePosts = mobilePosts.filter(mobilePost =>
+              !profilePostIdSet.has(mobilePost.shortcode)
+            );
+
+            if (uniqueMobilePosts.length > 0) {
+              posts = posts.concat(uniqueMobilePosts);
+              logger.info(`Strategy 2a: Mobile web added ${uniqueMobilePosts.length} NEW posts. Total: ${posts.length}`);
+            } else {
+              logger.warn(`Strategy 2a: Mobile web returned ${mobilePosts.length} posts but they were all duplicates`);
+            }
           }
         }
 
@@ -173,14 +246,12 @@ class InstagramService {
       logger.info(`Attempting to fetch ${limit} additional posts for @${username}, skipping first ${skip}`);
 
       // First get user ID from profile
-      const profileUrl = `${this.baseURL}/api/v1/users/web_profile_info/?username=${username}`;
-      const profileResponse = await this.makeRequest(profileUrl);
+      const user = await this.fetchProfileUser(username);
 
-      if (!profileResponse.data?.data?.user) {
+      if (!user) {
         throw new ApiError(404, `Instagram user @${username} not found`);
       }
 
-      const user = profileResponse.data.data.user;
       const userId = user.id;
 
       // Try multiple approaches to get additional posts
@@ -279,22 +350,22 @@ class InstagramService {
 
   /**
    * Fetch posts using pagination cursors to get older posts
+   * @param {Object} user - Raw Instagram user data already fetched from the profile
+   * @param {number} limit - Number of additional posts to fetch
    */
-  async fetchOlderPostsWithPagination(userId, limit) {
+  async fetchOlderPostsWithPagination(user, limit) {
     try {
+      const userId = user.id;
       logger.info(`Trying pagination approach for user ${userId}`);
 
-      // First, get the profile to find pagination cursor
-      const profileUrl = `${this.baseURL}/api/v1/users/web_profile_info/?username=${userId}`;
-      const profileResponse = await this.makeRequest(profileUrl);
+      // Pagination cursor comes from the profile we already have
+      const pageInfo = user.edge_owner_to_timeline_media?.page_info;
 
-      if (!profileResponse.data?.data?.user?.edge_owner_to_timeline_media?.page_info) {
+      if (!pageInfo) {
         logger.warn('No pagination info found in profile');
         return [];
       }
 
-      const pageInfo = profileResponse.data.data.user.edge_owner_to_timeline_media.page_info;
-
       if (!pageInfo.has_next_page || !pageInfo.end_cursor) {
         logger.warn('No next page available for pagination');
         return [];
@@ -343,27 +414,20 @@ class InstagramService {
         `${this.baseURL}/${username}/channel/?__a=1`
       ];
 
-      for (const endpoint of mobileEndpoints) {
-        try {
-          const response = await this.makeRequest(endpoint);
-
-          if (response.data?.graphql?.user?.edge_owner_to_timeline_media?.edges) {
-            const edges = response.data.graphql.user.edge_owner_to_timeline_media.edges;
-            logger.info(`Mobile endpoint returned ${edges.length} total posts`);
-
-            return edges
-              .slice(skip)
-              .slice(0, limit)
-              .map(edge => this.transformPostData(edge.node))
-              .filter(post => post !== null);
-          }
-        } catch (error) {
-          logger.warn(`Mobile endpoint ${endpoint} failed:`, error.message);
-          continue;
+      return await this.probeEndpoints(mobileEndpoints, 'Mobile', (response) => {
+        if (!response.data?.graphql?.user?.edge_owner_to_timeline_media?.edges) {
+          return null;
         }
-      }
 
-      return [];
+        const edges = response.data.graphql.user.edge_owner_to_timeline_media.edges;
+        logger.info(`Mobile endpoint returned ${edges.length} total posts`);
+
+        return edges
+          .slice(skip)
+          .slice(0, limit)
+          .map(edge => this.transformPostData(edge.node))
+          .filter(post => post !== null);
+      });
     } catch (error) {
       logger.warn('All mobile web approaches failed:', error.message);
       return [];
@@ -383,29 +447,64 @@ class InstagramService {
         `${this.baseURL}/api/v1/users/${userId}/media/?count=${limit + skip}`
       ];
 
-      for (const endpoint of mediaEndpoints) {
+      return await this.probeEndpoints(mediaEndpoints, 'Media', (response) => {
+        if (!Array.isArray(response.data?.items)) {
+          return null;
+        }
+
+        logger.info(`Media endpoint returned ${response.data.items.length} items`);
+
+        return response.data.items
+          .slice(skip)
+          .slice(0, limit)
+          .map(item => this.transformInstagramMediaItem(item))
+          .filter(post => post !== null);
+      });
+    } catch (error) {
+      logger.warn('All media endpoint approaches failed:', error.message);
+      return [];
+    }
+  }
+
+  /**
+   * Request several equivalent endpoints concurrently and keep the first usable response.
+   * Outstanding requests are aborted once a winner is found.
+   * @param {Array<string>} endpoints - Candidate endpoint URLs
+   * @param {string} label - Endpoint family used in log messages
+   * @param {Function} extract - Maps a response to posts, or returns null if the shape is unusable;
+   *   empty results count as failures
+   * @returns {Array} Posts from the first successful endpoint, or an empty array
+   */
+  async probeEndpoints(endpoints, label, extract) {
+    const controller = new AbortController();
+
+    try {
+      return await Promise.any(endpoints.map(async (endpoint) => {
         try {
-          const response = await this.makeRequest(endpoint);
+          const response = await this.makeRequest(endpoint, { signal: controller.signal });
+          const posts = extract(response);
 
-          if (response.data?.items && Array.isArray(response.data.items)) {
-            logger.info(`Media endpoint returned ${response.data.items.length} items`);
+          if (!posts) {
+            throw new Error('Unexpected response structure');
+          }
 
-            return response.data.items
-              .slice(skip)
-              .slice(0, limit)
-              .map(item => this.transformInstagramMediaItem(item))
-              .filter(post => post !== null);
+          // An empty page must not win the race over a slower endpoint that has posts
+          if (posts.length === 0) {
+            throw new Error('No posts in response');
           }
+
+          return posts;
         } catch (error) {
-          logger.warn(`Media endpoint ${endpoint} failed:`, error.message);
-          continue;
+          if (!controller.signal.aborted) {
+            logger.warn(`${label} endpoint ${endpoint} failed:`, error.message);
+          }
+          throw error;
         }
-      }
-
-      return [];
+      }));
     } catch (error) {
-      logger.warn('All media endpoint approaches failed:', error.message);
       return [];
+    } finally {
+      controller.abort();
     }
   }
 
@@ -797,8 +896,7 @@ class InstagramService {
    */
   extractHashtags(caption) {
     if (!caption) return [];
-    const hashtagRegex = /#[\w\u0590-\u05ff\u0900-\u097f]+/g;
-    return caption.match(hashtagRegex) || [];
+    return caption.match(HASHTAG_REGEX) || [];
   }
 
   /**
@@ -808,8 +906,7 @@ class InstagramService {
    */
   extractMentions(caption) {
     if (!caption) return [];
-    const mentionRegex = /@[\w.]+/g;
-    const matches = caption.match(mentionRegex) || [];
+    const matches = caption.match(MENTION_REGEX) || [];
     return matches.map(mention => ({
       username: mention.substring(1),
       user_id: null
@@ -828,14 +925,7 @@ class InstagramService {
       const tags = [];
       const lowerCaption = caption.toLowerCase();
 
-      // Common content categories
-      const categories = [
-        'fashion', 'food', 'travel', 'fitness', 'beauty', 'lifestyle',
-        'music', 'art', 'dance', 'comedy', 'tech', 'sports', 'nature',
-        'motivation', 'education', 'business', 'diy', 'recipe', 'tutorial'
-      ];
-
-      categories.forEach(category => {
+      CONTENT_CATEGORIES.forEach(category => {
         if (lowerCaption.includes(category)) {
           tags.push(category);
         }
@@ -891,36 +981,156 @@ class InstagramService {
    * @returns {boolean} Is valid username
    */
   isValidUsername(username) {
-    const usernameRegex = /^[a-zA-Z0-9._]{1,30}$/;
-    return usernameRegex.test(username);
+    return USERNAME_REGEX.test(username);
   }
 
   /**
    * Make HTTP request with error handling
    * @param {string} url - Request URL
+   * @param {Object} options - Optional request options
+   * @param {AbortSignal} options.signal - Signal used to cancel the request
+   * @param {boolean} options.retry - Retry transient failures with backoff (default: false)
    * @returns {Object} Response data
    */
-  async makeRequest(url) {
-    try {
-      const response = await axios.get(url, {
-        headers: this.headers,
-        timeout: 15000
-      });
+  async makeRequest(url, { signal, retry = false } = {}) {
+    for (let attempt = 0; ; attempt++) {
+      if (signal?.aborted) {
+        throw new ApiError(500, 'Instagram request aborted');
+      }
 
-      return response;
+      try {
+        const response = await httpClient.get(url, {
+          headers: this.headers,
+          timeout: 15000,
+          signal,
+          responseType: 'stream'
+        });
 
-    } catch (error) {
-      if (error.response) {
-        if (error.response.status === 404) {
-          throw new ApiError(404, 'Instagram user not found');
-        } else if (error.response.status === 429) {
-          throw new ApiError(429, 'Rate limit exceeded. Please try again later.');
-        } else if (error.response.status === 403) {
-          throw new ApiError(403, 'Access forbidden. User may be private.');
+        // Login walls come back as HTML pages; drop them without downloading the body
+        const contentType = response.headers['content-type'] || '';
+        if (contentType.includes('text/html')) {
+          logger.debug(`Instagram returned an HTML page for ${url}, discarding body`);
+          this.discardBody(response);
+          response.data = null;
+          return response;
         }
+
+        response.data = await this.readJsonBody(response.data);
+        return response;
+
+      } catch (error) {
+        this.discardBody(error.response);
+
+        // Back off and retry only when Instagram signals a transient failure
+        const status = error.response?.status;
+        const delay = retry && RETRYABLE_STATUSES.has(status) && attempt < MAX_RETRIES && !signal?.aborted
+          ? this.getRetryDelay(attempt, error.response.headers?.['retry-after'])
+          : null;
+
+        if (delay !== null) {
+          logger.warn(`Instagram returned ${status}, retrying in ${delay}ms (attempt ${attempt + 1}/${MAX_RETRIES})`);
+          await this.waitForRetry(delay, signal);
+          continue;
+        }
+
+        if (error.response) {
+          if (error.response.status === 404) {
+            throw new ApiError(404, 'Instagram user not found');
+          } else if (error.response.status === 429) {
+            throw new ApiError(429, 'Rate limit exceeded. Please try again later.');
+          } else if (error.response.status === 403) {
+            throw new ApiError(403, 'Access forbidden. User may be private.');
+          }
+        }
+
+        throw new ApiError(500, 'Instagram service temporarily unavailable');
+      }
+    }
+  }
+
+  /**
+   * Sleep before a retry, rejecting early if the request is aborted
+   * @param {number} delay - Delay in milliseconds
+   * @param {AbortSignal} signal - Signal used to cancel the request
+   * @returns {Promise<void>}
+   */
+  waitForRetry(delay, signal) {
+    return new Promise((resolve, reject) => {
+      const onAbort = () => {
+        clearTimeout(timer);
+        reject(new ApiError(500, 'Instagram request aborted'));
+      };
+
+      const timer = setTimeout(() => {
+        signal?.removeEventListener('abort', onAbort);
+        resolve();
+      }, delay);
+
+      signal?.addEventListener('abort', onAbort, { once: true });
+    });
+  }
+
+  /**
+   * Compute the delay before the next retry
+   * Honours a Retry-After header (delay-seconds or HTTP-date), otherwise uses jittered exponential backoff
+   * @param {number} attempt - Zero-based retry attempt
+   * @param {string} retryAfter - Retry-After header value, if any
+   * @returns {number|null} Delay in milliseconds, or null if Retry-After asks us to wait longer than we retry for
+   */
+  getRetryDelay(attempt, retryAfter) {
+    if (retryAfter) {
+      const retryAfterSeconds = Number(retryAfter);
+      const retryAfterMs = Number.isFinite(retryAfterSeconds)
+        ? retryAfterSeconds * 1000
+        : Date.parse(retryAfter) - Date.now();
+
+      if (Number.isFinite(retryAfterMs)) {
+        return retryAfterMs > MAX_RETRY_DELAY ? null : Math.max(0, retryAfterMs);
       }
+    }
+
+    const backoff = RETRY_BASE_DELAY * 2 ** attempt;
+    return Math.min(Math.round(backoff + Math.random() * backoff), MAX_RETRY_DELAY);
+  }
 
-      throw new ApiError(500, 'Instagram service temporarily unavailable');
+  /**
+   * Discard an unread response body
+   * Small bodies are drained so the keep-alive agent can reuse the socket;
+   * large or unsized HTML pages are destroyed, which closes the connection instead
+   * @param {Object} response - Axios response with a streamed body
+   */
+  discardBody(response) {
+    const stream = response?.data;
+    if (!stream?.resume) {
+      return;
+    }
+
+    const contentType = response.headers?.['content-type'] || '';
+    const contentLength = Number(response.headers?.['content-length']);
+    const isSmall = Number.isFinite(contentLength) && contentLength <= MAX_DRAIN_BYTES;
+
+    if (contentType.includes('text/html') && !isSmall) {
+      stream.destroy();
+    } else {
+      stream.resume();
+    }
+  }
+
+  /**
+   * Read a streamed response body and parse it as JSON
+   * @param {Stream} stream - Response body stream
+   * @returns {Object|null} Parsed body, or null if it is not valid JSON
+   */
+  async readJsonBody(stream) {
+    const chunks = [];
+    for await (const chunk of stream) {
+      chunks.push(chunk);
+    }
+
+    try {
+      return JSON.parse(Buffer.concat(chunks).toString('utf8'));
+    } catch (error) {
+      return null;
     }
   }
 
@@ -1067,7 +1277,7 @@ class InstagramService {
 
   extractHashtagsFromText(text) {
     if (!text) return [];
-    const hashtags = text.match(/#[a-zA-Z0-9_]+/g) || [];
+    const hashtags = text.match(ASCII_HASHTAG_REGEX) || [];
     return hashtags.map(tag => tag.slice(1)); // Remove the # symbol
   }
 
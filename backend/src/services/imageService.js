@@ -99,37 +99,44 @@ class ImageService {
   }
 
   /**
-   * Batch process multiple thumbnails
+   * Batch process multiple thumbnails with a bounded number of concurrent workers
    * @param {Array<{url: string, folder: string, publicId: string}>} thumbnails
-   * @returns {Promise<Array<{original: string, cloudinary: string}>>}
+   * @param {number} concurrency - Maximum thumbnails processed at once
+   * @returns {Promise<Array<{original: string, cloudinary: string}>>} Results in input order
    */
-  async batchProcessThumbnails(thumbnails) {
-    const results = [];
-
-    for (const thumbnail of thumbnails) {
-      try {
-        const cloudinaryUrl = await this.downloadAndUploadThumbnail(
-          thumbnail.url,
-          thumbnail.folder,
-          thumbnail.publicId
-        );
-
-        results.push({
-          original: thumbnail.url,
-          cloudinary: cloudinaryUrl
-        });
-
-        // Add small delay to avoid rate limiting
-        await new Promise(resolve => setTimeout(resolve, 500));
-
-      } catch (error) {
-        console.error(`❌ Failed to process thumbnail ${thumbnail.url}:`, error.message);
-        results.push({
-          original: thumbnail.url,
-          cloudinary: null
-        });
+  async batchProcessThumbnails(thumbnails, concurrency = 5) {
+    const results = new Array(thumbnails.length);
+    let nextIndex = 0;
+
+    const worker = async () => {
+      while (nextIndex < thumbnails.length) {
+        const index = nextIndex++;
+        const thumbnail = thumbnails[index];
+
+        try {
+          const cloudinaryUrl = await this.downloadAndUploadThumbnail(
+            thumbnail.url,
+            thumbnail.folder,
+            thumbnail.publicId
+          );
+
+          results[index] = {
+            original: thumbnail.url,
+            cloudinary: cloudinaryUrl
+          };
+
+        } catch (error) {
+          console.error(`❌ Failed to process thumbnail ${thumbnail.url}:`, error.message);
+          results[index] = {
+            original: thumbnail.url,
+            cloudinary: null
+          };
+        }
       }
-    }
+    };
+
+    const workerCount = Math.min(Math.max(1, concurrency), thumbnails.length);
+    await Promise.all(Array.from({ length: workerCount }, worker));
 
     return results;
   }